@@ -12,7 +12,7 @@ with open('HISTORY.rst') as history_file:
 
 requirements = ['numpy', 'xarray', 'pyspharm>=1.0.9']
 
-test_requirements = [ ]
+test_requirements = ['dask']
 
 setup(
     author="Sen Zhao",
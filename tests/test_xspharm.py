@@ -0,0 +1,423 @@
+#!/usr/bin/env python
+
+"""Tests for `xspharm` package."""
+
+import unittest
+import warnings
+
+import numpy as np
+import xarray as xr
+
+try:
+    from numpy.exceptions import ComplexWarning
+except ImportError:
+    from numpy import ComplexWarning
+
+from xspharm import xspharm
+
+
+def _grid_ds(nlat=19, nlon=36):
+    lat = np.linspace(90, -90, nlat)
+    lon = np.arange(nlon) * 360.0 / nlon
+    return xr.Dataset(coords={"lat": lat, "lon": lon})
+
+
+def _random_field(grid_ds, seed=0, **other_dims):
+    rng = np.random.default_rng(seed)
+    dims = tuple(other_dims) + ("lat", "lon")
+    shape = tuple(other_dims.values()) + (grid_ds.sizes["lat"], grid_ds.sizes["lon"])
+    coords = {dim: np.arange(size) for dim, size in other_dims.items()}
+    coords.update(lat=grid_ds["lat"], lon=grid_ds["lon"])
+    return xr.DataArray(rng.standard_normal(shape), coords=coords, dims=dims)
+
+
+def _map_slices(func, *fields):
+    """
+    Reference result of func applied to every 2-D [nlat, nlon] slice of the fields.
+    """
+    arrays = [field.transpose(..., "lat", "lon").values for field in fields]
+    lead_shape = arrays[0].shape[:-2]
+    results = [
+        func(*(array[index] for array in arrays)) for index in np.ndindex(lead_shape)
+    ]
+    if not isinstance(results[0], tuple):
+        return np.stack(results).reshape(lead_shape + results[0].shape)
+    return tuple(
+        np.stack(result).reshape(lead_shape + result[0].shape)
+        for result in zip(*results)
+    )
+
+
+def _assert_close(actual, expected, template=None):
+    """
+    Compare a result with a reference array laid out as [..., lat, lon] or [..., spec].
+    """
+    if template is not None:
+        actual = actual.transpose(*template.transpose(..., "lat", "lon").dims)
+        np.testing.assert_array_equal(actual["lat"], template["lat"])
+        np.testing.assert_array_equal(actual["lon"], template["lon"])
+    # pyspharm transforms in single precision, so only agreement to that level is
+    # expected where xspharm reorders or fuses operations
+    atol = 1e-6 * np.abs(expected).max()
+    np.testing.assert_allclose(actual.values, expected, rtol=1e-6, atol=atol)
+
+
+class TestAgainstSpharmt(unittest.TestCase):
+    """Tests of every method against direct Spharmt calls on 2-D slices."""
+
+    ntrunc = 12
+
+    def setUp(self):
+        self.grid_ds = _grid_ds()
+        self.xsp = xspharm(self.grid_ds)
+        self.s = self.xsp.s
+        # no, one and two leading dims
+        self.cases = [{}, {"time": 3}, {"time": 2, "lev": 3}]
+
+    def _fields(self, n, transpose=False, **other_dims):
+        fields = [
+            _random_field(self.grid_ds, seed=seed, **other_dims) for seed in range(n)
+        ]
+        if transpose:
+            fields = [field.transpose("lon", "lat", ...) for field in fields]
+        return fields
+
+    def _each_case(self, n):
+        return [
+            self._fields(n, transpose, **other_dims)
+            for other_dims in self.cases
+            for transpose in (False, True)
+        ]
+
+    def test_truncate(self):
+        for (x,) in self._each_case(1):
+            expected = _map_slices(
+                lambda a: self.s.spectogrd(self.s.grdtospec(a, self.ntrunc)), x
+            )
+            _assert_close(self.xsp.truncate(x, ntrunc=self.ntrunc), expected, x)
+
+    def test_exp_taper(self):
+        # taper weights as computed by the original loop over the triangular layout
+        nmax = self.xsp.ntrunc_native
+        lm = [(n, m) for m in range(nmax + 1) for n in range(m, nmax + 1)]
+        l_values, m_values = np.array(lm, dtype=float).T
+        tw = np.sqrt(l_values * (l_values + 1) + m_values**2)
+        taper = np.exp(-(((tw * (tw + 1)) / (self.ntrunc * (self.ntrunc + 1))) ** 2))
+
+        for (x,) in self._each_case(1):
+            expected = _map_slices(
+                lambda a: self.s.spectogrd(self.s.grdtospec(a) * taper), x
+            )
+            _assert_close(self.xsp.exp_taper(x, ntrunc=self.ntrunc), expected, x)
+
+    def test_dataset(self):
+        a, b, c = self._fields(3, time=2, lev=3)
+        ds = xr.Dataset(
+            {
+                "a": a,
+                "b": b.isel(time=0, lev=0),
+                "c": c.isel(lev=0).transpose("lon", "lat", "time"),
+            }
+        )
+        for method in (self.xsp.truncate, self.xsp.exp_taper):
+            with self.subTest(method.__name__):
+                result = method(ds, ntrunc=self.ntrunc)
+                for name, var in ds.data_vars.items():
+                    expected = method(var, ntrunc=self.ntrunc)
+                    _assert_close(result[name], expected.values, var)
+
+    def test_grd2spec(self):
+        for (x,) in self._each_case(1):
+            expected = _map_slices(lambda a: self.s.grdtospec(a, self.ntrunc), x)
+            _assert_close(
+                self.xsp.grd2spec(x, ntrunc=self.ntrunc).transpose(..., "spec"),
+                expected,
+            )
+
+    def test_spec2grd(self):
+        for (x,) in self._each_case(1):
+            _assert_close(
+                self.xsp.spec2grd(self.xsp.grd2spec(x, ntrunc=self.ntrunc)),
+                self.xsp.truncate(x, ntrunc=self.ntrunc)
+                .transpose(..., "lat", "lon")
+                .values,
+                x,
+            )
+
+    def test_uv2spec(self):
+        for u, v in self._each_case(2):
+            vor, div = _map_slices(
+                lambda a, b: self.s.getvrtdivspec(a, b, self.ntrunc), u, v
+            )
+            result = self.xsp.uv2spec(u, v, ntrunc=self.ntrunc)
+            _assert_close(result["vor"].transpose(..., "spec"), vor)
+            _assert_close(result["div"].transpose(..., "spec"), div)
+
+    def test_uv2sfvp(self):
+        for u, v in self._each_case(2):
+            sf, vp = _map_slices(lambda a, b: self.s.getpsichi(a, b, self.ntrunc), u, v)
+            result = self.xsp.uv2sfvp(u, v, ntrunc=self.ntrunc)
+            _assert_close(result["sf"], sf, u)
+            _assert_close(result["vp"], vp, u)
+
+    def test_uv2vordiv(self):
+        def reference(a, b):
+            vor_spec, div_spec = self.s.getvrtdivspec(a, b, self.ntrunc)
+            return self.s.spectogrd(vor_spec), self.s.spectogrd(div_spec)
+
+        for u, v in self._each_case(2):
+            vor, div = _map_slices(reference, u, v)
+            result = self.xsp.uv2vordiv(u, v, ntrunc=self.ntrunc)
+            _assert_close(result["vor"], vor, u)
+            _assert_close(result["div"], div, u)
+
+    def test_uv2absvor(self):
+        def reference(a, b):
+            vor_spec, _ = self.s.getvrtdivspec(a, b, self.ntrunc)
+            return self.s.spectogrd(vor_spec) + self.xsp.fvor.values[:, np.newaxis]
+
+        for u, v in self._each_case(2):
+            expected = _map_slices(reference, u, v)
+            _assert_close(self.xsp.uv2absvor(u, v, ntrunc=self.ntrunc), expected, u)
+
+    def test_sf2uv(self):
+        for (sf,) in self._each_case(1):
+            vpsi, upsi = _map_slices(
+                lambda a: self.s.getgrad(self.s.grdtospec(a, self.ntrunc)), sf
+            )
+            result = self.xsp.sf2uv(sf, ntrunc=self.ntrunc)
+            _assert_close(result["u_rot"], -upsi, sf)
+            _assert_close(result["v_rot"], vpsi, sf)
+
+    def test_vp2uv(self):
+        for (vp,) in self._each_case(1):
+            udiv, vdiv = _map_slices(
+                lambda a: self.s.getgrad(self.s.grdtospec(a, self.ntrunc)), vp
+            )
+            result = self.xsp.vp2uv(vp, ntrunc=self.ntrunc)
+            _assert_close(result["u_div"], udiv, vp)
+            _assert_close(result["v_div"], vdiv, vp)
+
+    def test_sfvp2uv(self):
+        def reference(a, b):
+            vpsi, upsi = self.s.getgrad(self.s.grdtospec(a, self.ntrunc))
+            udiv, vdiv = self.s.getgrad(self.s.grdtospec(b, self.ntrunc))
+            return udiv - upsi, vdiv + vpsi
+
+        for sf, vp in self._each_case(2):
+            u, v = _map_slices(reference, sf, vp)
+            result = self.xsp.sfvp2uv(sf, vp, ntrunc=self.ntrunc)
+            _assert_close(result["u"], u, sf)
+            _assert_close(result["v"], v, sf)
+
+    def test_filter_uv(self):
+        def reference(a, b):
+            return self.s.getuv(*self.s.getvrtdivspec(a, b, self.ntrunc))
+
+        for u, v in self._each_case(2):
+            expected_u, expected_v = _map_slices(reference, u, v)
+            result = self.xsp.filter_uv(u, v, ntrunc=self.ntrunc)
+            _assert_close(result["u"], expected_u, u)
+            _assert_close(result["v"], expected_v, u)
+
+            # same winds as the round trip through streamfunction and velocity potential
+            roundtrip = self.xsp.sfvp2uv(
+                *self.xsp.uv2sfvp(u, v, ntrunc=self.ntrunc).data_vars.values(),
+                ntrunc=self.ntrunc,
+            )
+            _assert_close(result["u"], roundtrip["u"].values)
+            _assert_close(result["v"], roundtrip["v"].values)
+
+    def test_filter_uv_taper(self):
+        taper = self.xsp._taper_filter(self.ntrunc, 2)
+
+        def reference(a, b):
+            vor_spec, div_spec = self.s.getvrtdivspec(a, b)
+            return self.s.getuv(vor_spec * taper, div_spec * taper)
+
+        for u, v in self._each_case(2):
+            expected_u, expected_v = _map_slices(reference, u, v)
+            result = self.xsp.filter_uv(u, v, ntrunc=self.ntrunc, taper=2)
+            _assert_close(result["u"], expected_u, u)
+            _assert_close(result["v"], expected_v, u)
+
+
+class TestCoords(unittest.TestCase):
+    """Tests that results keep the lat/lon coords of their gridded input."""
+
+    def setUp(self):
+        self.grid_ds = _grid_ds()
+        self.xsp = xspharm(self.grid_ds)
+        # same grid, but labelled south to north and with attrs, unlike grid_ds
+        self.fields = [
+            _random_field(self.grid_ds, seed=seed, time=2).assign_coords(
+                lat=(
+                    "lat",
+                    self.grid_ds["lat"].values[::-1],
+                    {"units": "degrees_north"},
+                ),
+                lon=("lon", self.grid_ds["lon"].values, {"units": "degrees_east"}),
+            )
+            for seed in range(2)
+        ]
+
+    def _check(self, result):
+        for da in result.data_vars.values():
+            for dim in ("lat", "lon"):
+                xr.testing.assert_identical(da[dim], self.fields[0][dim])
+
+    def test_sf2uv(self):
+        self._check(self.xsp.sf2uv(self.fields[0]))
+
+    def test_vp2uv(self):
+        self._check(self.xsp.vp2uv(self.fields[0]))
+
+    def test_uv2sfvp(self):
+        self._check(self.xsp.uv2sfvp(*self.fields))
+
+    def test_uv2vordiv(self):
+        self._check(self.xsp.uv2vordiv(*self.fields))
+
+
+class TestFvor(unittest.TestCase):
+    """Tests for the planetary vorticity attribute."""
+
+    def setUp(self):
+        self.grid_ds = _grid_ds()
+        self.xsp = xspharm(self.grid_ds)
+
+    def test_values(self):
+        expected = 2.0 * self.xsp.omega * np.sin(np.deg2rad(self.grid_ds["lat"]))
+        xr.testing.assert_allclose(self.xsp.fvor, expected)
+
+    def test_assignment(self):
+        u = _random_field(self.grid_ds, seed=1)
+        v = _random_field(self.grid_ds, seed=2)
+        relvor = self.xsp.uv2absvor(u, v) - self.xsp.fvor
+        fvor = 2.0 * self.xsp.fvor
+        self.xsp.fvor = fvor
+        xr.testing.assert_allclose(self.xsp.fvor, fvor)
+        np.testing.assert_allclose(self.xsp.uv2absvor(u, v), relvor + fvor)
+
+
+class TestDask(unittest.TestCase):
+    """Tests that dask-backed inputs stay lazy and match in-memory results."""
+
+    def setUp(self):
+        self.grid_ds = _grid_ds()
+        self.xsp = xspharm(self.grid_ds)
+        self.u = _random_field(self.grid_ds, seed=1, time=4, lev=2)
+        self.v = _random_field(self.grid_ds, seed=2, time=4, lev=2)
+
+    def _check(self, func, *fields):
+        expected = func(*fields)
+        with warnings.catch_warnings():
+            # building the graph must not warn about dask's meta inference
+            warnings.simplefilter("error", ComplexWarning)
+            result = func(*(field.chunk({"time": 1}) for field in fields))
+        if isinstance(expected, xr.DataArray):
+            expected = expected.to_dataset(name="x")
+            result = result.to_dataset(name="x")
+        for name, var in result.data_vars.items():
+            self.assertIsNotNone(var.chunks, name)
+            _assert_close(var.compute(), expected[name].values)
+
+    def test_grid_methods(self):
+        self._check(lambda x: self.xsp.truncate(x, ntrunc=12), self.u)
+        self._check(lambda x: self.xsp.exp_taper(x, ntrunc=12), self.u)
+        self._check(
+            lambda x: self.xsp.truncate(xr.Dataset({"a": x, "b": 2.0 * x})), self.u
+        )
+        self._check(lambda x: self.xsp.spec2grd(self.xsp.grd2spec(x)), self.u)
+        self._check(self.xsp.sf2uv, self.u)
+        self._check(self.xsp.vp2uv, self.u)
+
+    def test_wind_methods(self):
+        for method in (
+            self.xsp.uv2spec,
+            self.xsp.uv2sfvp,
+            self.xsp.uv2vordiv,
+            self.xsp.uv2absvor,
+            self.xsp.sfvp2uv,
+            self.xsp.filter_uv,
+        ):
+            with self.subTest(method.__name__):
+                self._check(method, self.u, self.v)
+
+
+class TestBatchSize(unittest.TestCase):
+    """Tests for streaming inputs through spharm in batches."""
+
+    def setUp(self):
+        self.grid_ds = _grid_ds()
+        self.xsp = xspharm(self.grid_ds)
+        # 5 fields in batches of 2 leaves a final batch of a single field
+        self.xsp_batched = xspharm(self.grid_ds, batch_size=2)
+        self.field = _random_field(self.grid_ds, time=5)
+
+    def test_truncate(self):
+        np.testing.assert_array_equal(
+            self.xsp_batched.truncate(self.field, ntrunc=10),
+            self.xsp.truncate(self.field, ntrunc=10),
+        )
+
+    def test_exp_taper(self):
+        np.testing.assert_array_equal(
+            self.xsp_batched.exp_taper(self.field, ntrunc=10),
+            self.xsp.exp_taper(self.field, ntrunc=10),
+        )
+
+    def test_dataset(self):
+        ds = xr.Dataset({"a": self.field, "b": self.field.isel(time=0) * 2.0})
+        batched = self.xsp_batched.truncate(ds, ntrunc=10)
+        unbatched = self.xsp.truncate(ds, ntrunc=10)
+        for name in ds.data_vars:
+            np.testing.assert_array_equal(batched[name], unbatched[name])
+
+    def test_invalid(self):
+        for batch_size in (0, -1, 2.5, "2"):
+            with self.assertRaises(ValueError):
+                xspharm(self.grid_ds, batch_size=batch_size)
+
+
+class TestPrecision(unittest.TestCase):
+    """Tests for the dtype of returned fields."""
+
+    def setUp(self):
+        self.grid_ds = _grid_ds()
+        self.xsp = xspharm(self.grid_ds)
+        self.xsp_double = xspharm(self.grid_ds, precision="double")
+        self.u = _random_field(self.grid_ds, seed=1, time=2)
+        self.v = _random_field(self.grid_ds, seed=2, time=2)
+
+    def test_default(self):
+        # pyspharm's single-precision output is returned as is
+        self.assertEqual(self.xsp.truncate(self.u, ntrunc=12).dtype, np.float32)
+        self.assertEqual(self.xsp.uv2absvor(self.u, self.v).dtype, np.float32)
+        self.assertEqual(self.xsp.grd2spec(self.u).dtype, np.complex64)
+        self.assertEqual(self.xsp.uv2spec(self.u, self.v)["vor"].dtype, np.complex64)
+
+    def test_double(self):
+        self.assertEqual(self.xsp_double.grd2spec(self.u).dtype, np.complex128)
+        self.assertEqual(self.xsp_double.truncate(self.u).dtype, np.float64)
+        single = self.xsp.uv2sfvp(self.u, self.v, ntrunc=12)
+        double = self.xsp_double.uv2sfvp(self.u, self.v, ntrunc=12)
+        for name in ("sf", "vp"):
+            self.assertEqual(double[name].dtype, np.float64)
+            # double precision only upcasts the final grids
+            np.testing.assert_array_equal(double[name], single[name].astype(np.float64))
+        for method in (self.xsp_double.sf2uv, self.xsp_double.vp2uv):
+            for da in method(self.u, ntrunc=12).data_vars.values():
+                self.assertEqual(da.dtype, np.float64)
+
+    def test_auto(self):
+        xsp_auto = xspharm(self.grid_ds, precision="auto")
+        u32 = self.u.astype(np.float32)
+        v32 = self.v.astype(np.float32)
+        self.assertEqual(xsp_auto.truncate(u32, ntrunc=12).dtype, np.float32)
+        self.assertEqual(xsp_auto.uv2vordiv(u32, v32)["vor"].dtype, np.float32)
+        self.assertEqual(xsp_auto.truncate(self.u, ntrunc=12).dtype, np.float64)
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            xspharm(self.grid_ds, precision="half")
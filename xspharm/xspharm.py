@@ -10,18 +10,25 @@ class xspharm:
     Attributes:
         nlat (int): Number of latitude points.
         nlon (int): Number of longitude points.
+        ntrunc_native (int): Highest wavenumber the grid resolves, nlat - 1.
         fvor (xarray DataArray) : planetary vorticity
-        s (Spharmt): Spharmt object for spherical harmonic operations.
+        rsphere (float): Radius of the sphere.
+        omega (float): Rotation rate of the planet.
+        s (Spharmt): Spharmt object (or compatible backend) for spherical harmonic operations.
 
     Methods:
         truncate: Truncate a data variable or entire dataset to a specific wavenumber.
         exp_taper: Apply tapering to spherical harmonic coefficients.
+        grd2spec: Transform gridded data to spherical harmonic coefficients.
+        spec2grd: Transform spherical harmonic coefficients back to gridded data.
+        uv2spec: Convert zonal and meridional wind components to spectral vorticity and divergence.
         uv2sfvp: Convert zonal and meridional wind components to streamfunction and velocity potential.
         uv2vordiv: Convert zonal and meridional wind components to vorticity and divergence.
         uv2absvor: Convert zonal and meridional wind components to absolute vorticity.
         sf2uv: Convert streamfunction to rotational wind components.
         vp2uv: Convert velocity potential to divergent wind components.
         sfvp2uv: Convert streamfunction and velocity potential to zonal and meridional wind components.
+        filter_uv: Truncate or taper zonal and meridional wind components in spectral space.
     """
 
     def __init__(
@@ -31,6 +38,9 @@ class xspharm:
         rsphere=6.3712e6,
         omega=7.292e-5,
         legfunc="stored",
+        backend="pyspharm",
+        batch_size=None,
+        precision="single",
     ):
         """
         Initialize the XSpharm class with the given dataset and spherical harmonic transform parameters.
@@ -40,14 +50,81 @@ class xspharm:
             gridtype (str): Type of grid, either 'regular' or 'gaussian'.
             rsphere (float): Radius of the sphere, defaults to Earth's radius in meters.
             omega (float): Rotation rate of the planet, defaults to Earth's rotation rate.
-            legfunc (str): Legendre function computation method, either 'stored' or 'computed'.
+            legfunc (str): Legendre function computation method, either 'stored', 'computed' or 'auto'.
+                'auto' stores the associated Legendre functions for grids with at most 128
+                latitudes and recomputes them on the fly for larger grids, where the stored
+                table outgrows the CPU caches and fetching it costs more than recomputing it.
+            backend (str or object): Spherical harmonic transform backend, 'pyspharm' by default.
+                Any object providing the Spharmt methods grdtospec, spectogrd, getvrtdivspec,
+                getuv and getgrad for the same grid, with spharm's triangular coefficient layout,
+                can be passed instead.
+            batch_size (int, optional): Maximum number of 2-D fields handed to spharm at once by
+                truncate and exp_taper. Larger inputs are streamed through in batches, which caps
+                the memory of spharm's intermediate arrays. Default is None (no limit).
+            precision (str): Precision of the returned fields, either 'single', 'double' or 'auto'.
+                pyspharm transforms in single precision, so 'single' returns its output as is,
+                while 'double' upcasts the results. 'auto' returns single precision for
+                single-precision input and double otherwise. Default is 'single'.
         """
         self.nlat = len(grid_ds["lat"])
         self.nlon = len(grid_ds["lon"])
-        self.fvor = 2.0 * omega * np.sin(np.deg2rad(grid_ds["lat"]))
-        self.s = Spharmt(
-            self.nlon, self.nlat, gridtype=gridtype, rsphere=rsphere, legfunc=legfunc
-        )
+        self.ntrunc_native = self.nlat - 1
+        if legfunc == "auto":
+            legfunc = "stored" if self.nlat <= 128 else "computed"
+        self._lat = grid_ds["lat"].reset_coords(drop=True)
+        self._lon = grid_ds["lon"].reset_coords(drop=True)
+        if precision not in ("double", "single", "auto"):
+            raise ValueError(
+                "precision should be 'double', 'single' or 'auto', got '{}'.".format(
+                    precision
+                )
+            )
+        self.precision = precision
+        if batch_size is not None and not (
+            isinstance(batch_size, (int, np.integer)) and batch_size >= 1
+        ):
+            raise ValueError(
+                "batch_size should be None or a positive integer, got {!r}.".format(
+                    batch_size
+                )
+            )
+        self.batch_size = batch_size
+        self.rsphere = rsphere
+        self.omega = omega
+        # planetary vorticity as an [nlat, 1] column, which broadcasts over
+        # [..., nlat, nlon] grids
+        lat_rad = np.deg2rad(grid_ds["lat"].values)
+        self._f = (2.0 * omega * np.sin(lat_rad))[:, np.newaxis]
+        if backend == "pyspharm":
+            self.s = Spharmt(
+                self.nlon,
+                self.nlat,
+                gridtype=gridtype,
+                rsphere=rsphere,
+                legfunc=legfunc,
+            )
+        elif isinstance(backend, str):
+            raise ValueError("Unknown backend '{}'.".format(backend))
+        else:
+            self.s = backend
+
+        # total wavenumber of each coefficient in triangular layout (m-major, l >= m),
+        # exact in integers up to the square root
+        m_values, l_values = np.triu_indices(self.ntrunc_native + 1)
+        tw = np.sqrt((l_values * (l_values + 1) + m_values * m_values).astype(float))
+        self._taper_base = tw * (tw + 1)
+        self._taper_cache = {}
+
+    @property
+    def fvor(self):
+        """
+        Planetary vorticity on the grid latitudes, a view of the column uv2absvor adds.
+        """
+        return xr.DataArray(self._f[:, 0], coords={"lat": self._lat}, dims="lat")
+
+    @fvor.setter
+    def fvor(self, fvor):
+        self._f = np.asarray(fvor, dtype=np.float64).reshape(self.nlat, 1)
 
     def truncate(self, ds_or_var, ntrunc=None):
         """
@@ -62,21 +139,15 @@ class xspharm:
         """
         if isinstance(ds_or_var, xr.Dataset):
             # Create a new dataset by applying truncation to each data variable
-            truncated_data = {}
-            for var_name, var_data in ds_or_var.data_vars.items():
-                truncated_data[var_name] = self._truncate_var(var_data, ntrunc)
-            return xr.Dataset(truncated_data)
+            return self._apply_dataset(self._truncate_grid, ds_or_var, ntrunc)
         elif isinstance(ds_or_var, xr.DataArray):
-            return self._truncate_var(ds_or_var, ntrunc)
+            return self._apply_var(self._truncate_grid, ds_or_var, ntrunc)
         else:
             raise ValueError("Input should be an xarray Dataset or DataArray.")
 
-    def _truncate_var(self, var_ds, ntrunc=None):
-        other_dims = _get_other_dims(var_ds)
-        var_data = _transpose_to_spharm(var_ds)
-        spec_data = self.s.grdtospec(var_data.values, ntrunc=ntrunc)
-        grid_data = var_data.copy(data=self.s.spectogrd(spec_data))
-        return _transpose_from_spharm(grid_data, other_dims)
+    def _truncate_grid(self, grid, ntrunc=None):
+        spec_data = self.s.grdtospec(grid, ntrunc=ntrunc)
+        return self.s.spectogrd(spec_data)
 
     def exp_taper(self, ds_or_var, ntrunc=None, r=2):
         """
@@ -84,54 +155,252 @@ class xspharm:
 
         Args:
         - ds_or_var (xr.DataArray or xr.Dataset): Input data.
-        - ntrunc (int): Truncation wavenumber N.
+        - ntrunc (int, optional): Truncation wavenumber N. Default is None (nlat - 1).
         - r (float): User-defined parameter.
 
         Returns:
         xr.DataArray or xr.Dataset: Tapered data.
         """
         if isinstance(ds_or_var, xr.Dataset):
-            tapered_data = {}
-            for var_name, var_data in ds_or_var.data_vars.items():
-                tapered_data[var_name] = self._exp_taper_var(var_data, ntrunc, r)
-            return xr.Dataset(tapered_data)
+            return self._apply_dataset(self._exp_taper_grid, ds_or_var, ntrunc, r)
         elif isinstance(ds_or_var, xr.DataArray):
-            return self._exp_taper_var(ds_or_var, ntrunc, r)
+            return self._apply_var(self._exp_taper_grid, ds_or_var, ntrunc, r)
         else:
             raise ValueError("Input should be an xarray Dataset or DataArray.")
 
-    def _exp_taper_var(self, var_ds, ntrunc, r):
-        other_dims = _get_other_dims(var_ds)
-        var_data = _transpose_to_spharm(var_ds)
-
+    def _exp_taper_grid(self, grid, ntrunc, r):
         # Compute spherical harmonic coefficients
-        spec_data = self.s.grdtospec(var_data.values)
-
-        # Compute l and m values based on triangular layout
-        l_values, m_values = [], []
-        for m in range(self.nlat - 1 + 1):
-            for l in range(m, self.nlat - 1 + 1):
-                l_values.append(l)
-                m_values.append(m)
-
-        l_values = np.array(l_values, dtype=float)
-        m_values = np.array(m_values, dtype=float)
-        total_wavenumber = np.sqrt(l_values * (l_values + 1) + m_values**2)
-
-        # Apply tapering based on the given equation
-        taper_filter = np.exp(
-            -(
-                ((total_wavenumber * (total_wavenumber + 1)) / (ntrunc * (ntrunc + 1)))
-                ** r
+        spec_data = self.s.grdtospec(grid)
+
+        # spharm returns Fortran-ordered [nspec, nt] coefficients, so the in-place
+        # multiply streams contiguously along nspec for every slice
+        taper_filter = self._taper_filter(ntrunc, r)
+        spec_data = spec_data.reshape(taper_filter.size, -1)
+        np.multiply(spec_data, taper_filter[:, np.newaxis], out=spec_data)
+
+        # Convert back to grid data
+        return self.s.spectogrd(spec_data)
+
+    def _apply_var(self, grid_func, var_ds, *args):
+        """
+        Apply a grid-to-grid function over the 'lat' and 'lon' dims of a DataArray.
+
+        Dask-backed data stay lazy and are transformed chunk by chunk in parallel,
+        in which case 'lat' and 'lon' must each be a single chunk.
+        """
+
+        dtype = self._grid_dtype(var_ds.dtype)
+
+        def kernel(data):
+            grid = self._batched(grid_func, _grid_to_spharm(data), *args)
+            return _grid_from_spharm(grid, data.shape[:-2], dtype)
+
+        return xr.apply_ufunc(
+            kernel,
+            var_ds,
+            input_core_dims=[["lat", "lon"]],
+            output_core_dims=[["lat", "lon"]],
+            dask="parallelized",
+            output_dtypes=[dtype],
+            keep_attrs=True,
+        )
+
+    def _apply_dataset(self, grid_func, ds, *args):
+        """
+        Apply a grid-to-grid function to every data variable of a Dataset.
+        """
+        return xr.Dataset(
+            {
+                var_name: self._apply_var(grid_func, var, *args)
+                for var_name, var in ds.data_vars.items()
+            }
+        )
+
+    def _grid_dtype(self, dtype):
+        """
+        dtype of gridded results computed from data of the given dtype.
+        """
+        return np.float32 if self._single(dtype) else np.float64
+
+    def _spec_dtype(self, dtype):
+        """
+        dtype of spectral coefficients computed from data of the given dtype.
+        """
+        return np.complex64 if self._single(dtype) else np.complex128
+
+    def _single(self, dtype):
+        """
+        Whether results computed from data of the given dtype are single precision.
+        """
+        return self.precision == "single" or (
+            self.precision == "auto" and dtype in (np.float32, np.complex64)
+        )
+
+    def _batched(self, grid_func, grid, *args):
+        """
+        Apply a grid-to-grid function to [nlat, nlon, nt] data, batch_size fields at a time.
+        """
+        nt = grid.shape[2]
+        if self.batch_size is None or nt <= self.batch_size:
+            return grid_func(grid, *args).reshape(grid.shape)
+
+        result = np.empty(grid.shape, dtype=np.float32, order="F")
+        for start in range(0, nt, self.batch_size):
+            batch = grid[:, :, start : start + self.batch_size]
+            result[:, :, start : start + self.batch_size] = grid_func(
+                batch, *args
+            ).reshape(batch.shape)
+        return result
+
+    def _taper_filter(self, ntrunc, r):
+        """
+        Exponential taper weights for each spectral coefficient, cached per (ntrunc, r).
+        """
+        if ntrunc is None:
+            ntrunc = self.ntrunc_native
+        key = (ntrunc, r)
+        taper_filter = self._taper_cache.get(key)
+        if taper_filter is None:
+            taper_filter = np.exp(-((self._taper_base / (ntrunc * (ntrunc + 1))) ** r))
+            # match spharm's complex64 coefficients, so the in-place multiply stays single
+            taper_filter = taper_filter.astype(np.float32)
+            self._taper_cache[key] = taper_filter
+        return taper_filter
+
+    def grd2spec(self, var_ds, ntrunc=None):
+        """
+        Transform a gridded data variable to spherical harmonic coefficients.
+
+        Chained spectral operations should stay in spectral space and call
+        spec2grd only once at the end, which avoids redundant synthesis/analysis pairs.
+
+        Args:
+        - var_ds (xr.DataArray): Input data.
+        - ntrunc (int, optional): Truncation wavenumber. Default is None.
+
+        Returns:
+        xr.DataArray: Complex coefficients along a 'spec' dimension, in spharm's triangular layout.
+        """
+        return self._grd2spec(var_ds, ntrunc, self._spec_dtype(var_ds.dtype))
+
+    def _grd2spec(self, var_ds, ntrunc, dtype):
+        """
+        grd2spec returning coefficients of the given dtype.
+        """
+        if ntrunc is None:
+            ntrunc = self.ntrunc_native
+
+        def kernel(data):
+            spec_data = self.s.grdtospec(_grid_to_spharm(data), ntrunc=ntrunc)
+            return _spec_from_spharm(spec_data, data.shape[:-2], dtype)
+
+        return xr.apply_ufunc(
+            kernel,
+            var_ds,
+            input_core_dims=[["lat", "lon"]],
+            output_core_dims=[["spec"]],
+            dask="parallelized",
+            output_dtypes=[dtype],
+            dask_gufunc_kwargs={"output_sizes": {"spec": _nspec(ntrunc)}},
+            keep_attrs=True,
+        )
+
+    def spec2grd(self, spec_ds):
+        """
+        Transform spherical harmonic coefficients back to gridded data.
+
+        Args:
+        - spec_ds (xr.DataArray): Coefficients along a 'spec' dimension, as returned by grd2spec.
+
+        Returns:
+        xr.DataArray: Gridded data.
+        """
+        return self._spec2grd(spec_ds, self._grid_dtype(spec_ds.dtype))
+
+    def _spec2grd(self, spec_ds, dtype, like=None):
+        """
+        spec2grd returning data of the given dtype, on the lat/lon coords of like if given.
+        """
+
+        def kernel(data):
+            grid_data = self.s.spectogrd(_spec_to_spharm(data))
+            return _grid_from_spharm(grid_data, data.shape[:-1], dtype)
+
+        grid_da = xr.apply_ufunc(
+            kernel,
+            spec_ds,
+            input_core_dims=[["spec"]],
+            output_core_dims=[["lat", "lon"]],
+            dask="parallelized",
+            dask_gufunc_kwargs={
+                "output_sizes": {"lat": self.nlat, "lon": self.nlon},
+                "meta": _grid_meta(spec_ds, dtype),
+            },
+            keep_attrs=True,
+        )
+        return grid_da.assign_coords(self._grid_coords(like))
+
+    def uv2spec(self, u_ds, v_ds, ntrunc=None):
+        """
+        Computes the spectral coefficients of vorticity and divergence, given the u and v wind components
+
+        Analysing the winds once and deriving further fields with spec2grd avoids
+        repeating the vector transform for every derived field.
+
+        Inputs:
+        u, v: zonal and meridional winds
+        ntrunc: Truncation limit (triangular truncation) for the spherical harmonic computation.
+
+        Returns:
+        vor, div: Complex coefficients along a 'spec' dimension, in spharm's triangular layout.
+        """
+        return self._uv2spec(u_ds, v_ds, ntrunc, self._spec_dtype(u_ds.dtype))
+
+    def _uv2spec(self, u_ds, v_ds, ntrunc, dtype):
+        """
+        uv2spec returning coefficients of the given dtype.
+        """
+        if ntrunc is None:
+            ntrunc = self.ntrunc_native
+
+        def kernel(u_data, v_data):
+            vor_spec, div_spec, lead_shape = self._vrtdivspec(u_data, v_data, ntrunc)
+            return (
+                _spec_from_spharm(vor_spec, lead_shape, dtype),
+                _spec_from_spharm(div_spec, lead_shape, dtype),
             )
+
+        vor_spec, div_spec = xr.apply_ufunc(
+            kernel,
+            u_ds,
+            v_ds,
+            input_core_dims=[["lat", "lon"], ["lat", "lon"]],
+            output_core_dims=[["spec"], ["spec"]],
+            dask="parallelized",
+            output_dtypes=[dtype, dtype],
+            dask_gufunc_kwargs={"output_sizes": {"spec": _nspec(ntrunc)}},
         )
-        spec_data *= (
-            taper_filter[:, np.newaxis] if spec_data.ndim == 2 else taper_filter
+        return xr.Dataset({"vor": vor_spec, "div": div_spec})
+
+    def _vrtdivspec(self, u_data, v_data, ntrunc):
+        """
+        spharm vorticity and divergence coefficients of [..., nlat, nlon] wind arrays.
+        """
+        u_data, v_data = np.broadcast_arrays(u_data, v_data)
+        vor_spec, div_spec = self.s.getvrtdivspec(
+            _grid_to_spharm(u_data), _grid_to_spharm(v_data), ntrunc=ntrunc
         )
+        return vor_spec, div_spec, u_data.shape[:-2]
 
-        # Convert back to grid data
-        grid_data = var_data.copy(data=self.s.spectogrd(spec_data))
-        return _transpose_from_spharm(grid_data, other_dims)
+    def _invlap(self, spec_ds):
+        """
+        Inverse Laplacian of spectral coefficients, e.g. vorticity to streamfunction.
+        """
+        ntrunc = int(round((np.sqrt(8 * spec_ds.sizes["spec"] + 1) - 3) / 2))
+        _, l_values = np.triu_indices(ntrunc + 1)
+        invlap = np.zeros(l_values.shape, dtype=np.finfo(spec_ds.dtype).dtype)
+        invlap[1:] = -self.rsphere**2 / (l_values[1:] * (l_values[1:] + 1.0))
+        return spec_ds * xr.DataArray(invlap, dims="spec")
 
     def uv2sfvp(self, u_ds, v_ds, ntrunc=None):
         """
@@ -144,15 +413,11 @@ class xspharm:
         Returns:
         sf, vp: The streamfunction and velocity potential respectively.
         """
-        other_dims = _get_other_dims(u_ds)
-        u_data = _transpose_to_spharm(u_ds)
-        v_data = _transpose_to_spharm(v_ds)
-        psi_data, chi_data = self.s.getpsichi(
-            u_data.values, v_data.values, ntrunc=ntrunc
-        )
-
-        psi_ds = _transpose_from_spharm(u_data.copy(data=psi_data), other_dims)
-        chi_ds = _transpose_from_spharm(u_data.copy(data=chi_data), other_dims)
+        # keep the intermediate coefficients in spharm's complex64, cast only the grids
+        dtype = self._grid_dtype(u_ds.dtype)
+        spec_ds = self._uv2spec(u_ds, v_ds, ntrunc, np.complex64)
+        psi_ds = self._spec2grd(self._invlap(spec_ds["vor"]), dtype, u_ds)
+        chi_ds = self._spec2grd(self._invlap(spec_ds["div"]), dtype, u_ds)
         psi_ds.attrs["long_name"] = "streamfunction"
         psi_ds.attrs["units"] = "m**2/s"
         chi_ds.attrs["long_name"] = "velocity potential"
@@ -170,19 +435,10 @@ class xspharm:
         Returns:
         vor, div : the vorticity and divergence respectively.
         """
-        other_dims = _get_other_dims(u_ds)
-        u_data = _transpose_to_spharm(u_ds)
-        v_data = _transpose_to_spharm(v_ds)
-
-        vor_spec, div_spec = self.s.getvrtdivspec(
-            u_data.values, v_data.values, ntrunc=ntrunc
-        )
-        vor_ds = _transpose_from_spharm(
-            u_data.copy(data=self.s.spectogrd(vor_spec)), other_dims
-        )
-        div_ds = _transpose_from_spharm(
-            u_data.copy(data=self.s.spectogrd(div_spec)), other_dims
-        )
+        dtype = self._grid_dtype(u_ds.dtype)
+        spec_ds = self._uv2spec(u_ds, v_ds, ntrunc, np.complex64)
+        vor_ds = self._spec2grd(spec_ds["vor"], dtype, u_ds)
+        div_ds = self._spec2grd(spec_ds["div"], dtype, u_ds)
         vor_ds.attrs["long_name"] = "Vorticity"
         vor_ds.attrs["units"] = "1/s"
         div_ds.attrs["long_name"] = "Divergence"
@@ -200,17 +456,24 @@ class xspharm:
         Returns:
         vor: The absolute vorticity
         """
-        other_dims = _get_other_dims(u_ds)
-        u_data = _transpose_to_spharm(u_ds)
-        v_data = _transpose_to_spharm(v_ds)
-
-        vor_spec, _ = self.s.getvrtdivspec(u_data.values, v_data.values, ntrunc=ntrunc)
-        vor_ds = _transpose_from_spharm(
-            u_data.copy(data=self.s.spectogrd(vor_spec)), other_dims
+        dtype = self._grid_dtype(u_ds.dtype)
+
+        def kernel(u_data, v_data):
+            vor_spec, _, lead_shape = self._vrtdivspec(u_data, v_data, ntrunc)
+            vor = _grid_from_spharm(self.s.spectogrd(vor_spec), lead_shape, dtype)
+            # add planetary vorticity (Coriolis effect)
+            vor += self._f
+            return vor
+
+        vor_ds = xr.apply_ufunc(
+            kernel,
+            u_ds,
+            v_ds,
+            input_core_dims=[["lat", "lon"], ["lat", "lon"]],
+            output_core_dims=[["lat", "lon"]],
+            dask="parallelized",
+            output_dtypes=[dtype],
         )
-
-        # add planetary vorticity (Coriolis effect)
-        vor_ds = vor_ds + self.fvor
         vor_ds.attrs["long_name"] = "absolute vorticity"
         vor_ds.attrs["units"] = "1/s"
         return vor_ds
@@ -226,13 +489,13 @@ class xspharm:
         Returns:
         u, v: zonal and meridional winds
         """
-        other_dims = _get_other_dims(sf_ds)
-        sf_data = _transpose_to_spharm(sf_ds)
-        psi_spec = self.s.grdtospec(sf_data, ntrunc=ntrunc)
-        vpsi_data, upsi_data = self.s.getgrad(psi_spec)
+        psi_spec = self._grd2spec(sf_ds, ntrunc, np.complex64)
+        vpsi_ds, upsi_ds = self._spec2grad(
+            psi_spec, self._grid_dtype(sf_ds.dtype), sf_ds
+        )
 
-        u_ds = _transpose_from_spharm(sf_data.copy(data=-upsi_data), other_dims)
-        v_ds = _transpose_from_spharm(sf_data.copy(data=vpsi_data), other_dims)
+        u_ds = -upsi_ds
+        v_ds = vpsi_ds
         u_ds.attrs["long_name"] = "rotational component of U wind"
         u_ds.attrs["units"] = "m/s"
         v_ds.attrs["long_name"] = "rotational component of V wind"
@@ -249,19 +512,54 @@ class xspharm:
         Returns:
         u, v: zonal and meridional winds
         """
-        other_dims = _get_other_dims(vp_ds)
-        vp_data = _transpose_to_spharm(vp_ds)
-        chi_spec = self.s.grdtospec(vp_data, ntrunc=ntrunc)
-        udiv_data, vdiv_data = self.s.getgrad(chi_spec)
-
-        u_ds = _transpose_from_spharm(vp_data.copy(data=udiv_data), other_dims)
-        v_ds = _transpose_from_spharm(vp_data.copy(data=vdiv_data), other_dims)
+        chi_spec = self._grd2spec(vp_ds, ntrunc, np.complex64)
+        u_ds, v_ds = self._spec2grad(chi_spec, self._grid_dtype(vp_ds.dtype), vp_ds)
         u_ds.attrs["long_name"] = "divergent component of U wind"
         u_ds.attrs["units"] = "m/s"
         v_ds.attrs["long_name"] = "divergent component of V wind"
         v_ds.attrs["units"] = "m/s"
         return xr.Dataset({"u_div": u_ds, "v_div": v_ds})
 
+    def _grid_coords(self, like=None):
+        """
+        lat/lon coords for grids synthesised from coefficients.
+
+        Those of like, the gridded input, are carried through when given, with their
+        attrs; otherwise those of grid_ds are used.
+        """
+        if like is None:
+            return {"lat": self._lat, "lon": self._lon}
+        return {"lat": like["lat"].variable, "lon": like["lon"].variable}
+
+    def _spec2grad(self, spec_ds, dtype, like=None):
+        """
+        Eastward and northward gradient components of a field given its spectral coefficients.
+
+        The gradients are labelled with the lat/lon coords of like, if given.
+        """
+
+        def kernel(data):
+            lead_shape = data.shape[:-1]
+            ugrad, vgrad = self.s.getgrad(_spec_to_spharm(data))
+            return (
+                _grid_from_spharm(ugrad, lead_shape, dtype),
+                _grid_from_spharm(vgrad, lead_shape, dtype),
+            )
+
+        ugrad, vgrad = xr.apply_ufunc(
+            kernel,
+            spec_ds,
+            input_core_dims=[["spec"]],
+            output_core_dims=[["lat", "lon"], ["lat", "lon"]],
+            dask="parallelized",
+            dask_gufunc_kwargs={
+                "output_sizes": {"lat": self.nlat, "lon": self.nlon},
+                "meta": (_grid_meta(spec_ds, dtype), _grid_meta(spec_ds, dtype)),
+            },
+        )
+        coords = self._grid_coords(like)
+        return ugrad.assign_coords(coords), vgrad.assign_coords(coords)
+
     def sfvp2uv(self, sf_ds, vp_ds, ntrunc=None):
         """
         Computes the wind components via spherical harmonics, given streamfunction and velocity potential.
@@ -274,20 +572,35 @@ class xspharm:
         Returns:
         u, v: zonal and meridional winds
         """
-        other_dims = _get_other_dims(sf_ds)
-        sf_data = _transpose_to_spharm(sf_ds)
-        vp_data = _transpose_to_spharm(vp_ds)
-
-        psi_spec = self.s.grdtospec(sf_data, ntrunc=ntrunc)
-        vpsi_data, upsi_data = self.s.getgrad(psi_spec)
-        chi_spec = self.s.grdtospec(vp_data, ntrunc=ntrunc)
-        udiv_data, vdiv_data = self.s.getgrad(chi_spec)
+        dtype = self._grid_dtype(sf_ds.dtype)
+
+        def kernel(sf_data, vp_data):
+            sf_data, vp_data = np.broadcast_arrays(sf_data, vp_data)
+            lead_shape = sf_data.shape[:-2]
+
+            # SPHEREPACK's cost is per field, so transforming sf and vp separately is
+            # as cheap as one call over both and avoids staging them into one buffer
+            psi_spec = self.s.grdtospec(_grid_to_spharm(sf_data), ntrunc=ntrunc)
+            vpsi_data, upsi_data = self.s.getgrad(psi_spec)
+            chi_spec = self.s.grdtospec(_grid_to_spharm(vp_data), ntrunc=ntrunc)
+            udiv_data, vdiv_data = self.s.getgrad(chi_spec)
+
+            # accumulate into spharm's output arrays rather than allocating new ones
+            udiv_data -= upsi_data
+            vdiv_data += vpsi_data
+            return (
+                _grid_from_spharm(udiv_data, lead_shape, dtype),
+                _grid_from_spharm(vdiv_data, lead_shape, dtype),
+            )
 
-        u_ds = _transpose_from_spharm(
-            sf_data.copy(data=udiv_data - upsi_data), other_dims
-        )
-        v_ds = _transpose_from_spharm(
-            sf_data.copy(data=vdiv_data + vpsi_data), other_dims
+        u_ds, v_ds = xr.apply_ufunc(
+            kernel,
+            sf_ds,
+            vp_ds,
+            input_core_dims=[["lat", "lon"], ["lat", "lon"]],
+            output_core_dims=[["lat", "lon"], ["lat", "lon"]],
+            dask="parallelized",
+            output_dtypes=[dtype, dtype],
         )
         u_ds.attrs["long_name"] = "U wind"
         u_ds.attrs["units"] = "m/s"
@@ -295,41 +608,106 @@ class xspharm:
         v_ds.attrs["units"] = "m/s"
         return xr.Dataset({"u": u_ds, "v": v_ds})
 
+    def filter_uv(self, u_ds, v_ds, ntrunc=None, taper=None):
+        """
+        Truncates or tapers the wind components via their spectral vorticity and divergence.
+
+        The winds are analysed once and synthesised directly from the filtered vorticity
+        and divergence, instead of going through uv2sfvp and sfvp2uv.
+
+        Inputs:
+        u, v: zonal and meridional winds
+        ntrunc: Truncation limit (triangular truncation) for the spherical harmonic computation.
+            With taper, the wavenumber N of the exponential taper as in exp_taper instead.
+        taper: Exponent r of the exponential taper, see exp_taper. Default is None (no taper).
+
+        Returns:
+        u, v: filtered zonal and meridional winds
+        """
+        dtype = self._grid_dtype(u_ds.dtype)
+
+        def kernel(u_data, v_data):
+            if taper is None:
+                vor_spec, div_spec, lead_shape = self._vrtdivspec(
+                    u_data, v_data, ntrunc
+                )
+            else:
+                vor_spec, div_spec, lead_shape = self._vrtdivspec(u_data, v_data, None)
+                taper_filter = self._taper_filter(ntrunc, taper)[:, np.newaxis]
+                vor_spec = vor_spec.reshape(taper_filter.size, -1)
+                div_spec = div_spec.reshape(taper_filter.size, -1)
+                np.multiply(vor_spec, taper_filter, out=vor_spec)
+                np.multiply(div_spec, taper_filter, out=div_spec)
+            u_data, v_data = self.s.getuv(vor_spec, div_spec)
+            return (
+                _grid_from_spharm(u_data, lead_shape, dtype),
+                _grid_from_spharm(v_data, lead_shape, dtype),
+            )
+
+        u_out, v_out = xr.apply_ufunc(
+            kernel,
+            u_ds,
+            v_ds,
+            input_core_dims=[["lat", "lon"], ["lat", "lon"]],
+            output_core_dims=[["lat", "lon"], ["lat", "lon"]],
+            dask="parallelized",
+            output_dtypes=[dtype, dtype],
+        )
+        u_out.attrs.update(u_ds.attrs)
+        v_out.attrs.update(v_ds.attrs)
+        return xr.Dataset({"u": u_out, "v": v_out})
 
-def _get_other_dims(input_data):
+
+def _nspec(ntrunc):
     """
-    Get other dimensions besides 'lat' and 'lon'.
+    Number of spectral coefficients of a triangular truncation at ntrunc.
     """
-    spatial_dims = ["lat", "lon"]
-    other_dims = [dim for dim in input_data.dims if dim not in spatial_dims]
-    return other_dims
+    return (ntrunc + 1) * (ntrunc + 2) // 2
 
 
-def _transpose_to_spharm(input_data):
+def _grid_meta(spec_ds, dtype):
     """
-    Transpose data to fit spharm's expected layout: [nlat, nlon, nt].
+    Empty array standing in for the grids synthesised from spec_ds in dask's graph.
+
+    Passed as meta, it spares dask from inferring one by casting the complex
+    coefficients to the real output dtype, which warns.
     """
-    other_dims = _get_other_dims(input_data)
+    return np.empty((0,) * (spec_ds.ndim + 1), dtype=dtype)
 
-    if len(other_dims) == 0:
-        return input_data
-    elif len(other_dims) == 1:
-        return input_data.transpose("lat", "lon", other_dims[0])
-    elif len(other_dims) >= 2:
-        return input_data.stack(nt=other_dims).transpose("lat", "lon", "nt")
-    else:
-        raise ValueError("Input data dimensions not supported.")
+
+def _grid_to_spharm(data):
+    """
+    Lay out [..., nlat, nlon] data as spharm's Fortran-ordered [nlat, nlon, nt], copying once.
+
+    pyspharm's f2py signatures take single precision, so staging in float32 spares
+    f2py a second copy.
+    """
+    nlat, nlon = data.shape[-2:]
+    data = np.ascontiguousarray(np.swapaxes(data, -1, -2), dtype=np.float32)
+    return data.reshape(-1, nlon, nlat).T
+
+
+def _grid_from_spharm(grid, lead_shape, dtype=np.float64):
+    """
+    Lay out spharm's [nlat, nlon(, nt)] grids back as [..., nlat, nlon], copying only to cast.
+    """
+    nlat, nlon = grid.shape[:2]
+    grid = grid.reshape(nlat, nlon, -1).T.reshape(lead_shape + (nlon, nlat))
+    return np.swapaxes(grid, -1, -2).astype(dtype, copy=False)
+
+
+def _spec_to_spharm(data):
+    """
+    Lay out [..., nspec] coefficients as spharm's Fortran-ordered [nspec, nt].
+    """
+    nspec = data.shape[-1]
+    return np.ascontiguousarray(data, dtype=np.complex64).reshape(-1, nspec).T
 
 
-def _transpose_from_spharm(sp_data, other_dims):
+def _spec_from_spharm(spec, lead_shape, dtype=np.complex128):
     """
-    Transpose data back from spharm's layout.
+    Lay out spharm's [nspec(, nt)] coefficients back as [..., nspec].
     """
-    if len(other_dims) == 0:
-        return sp_data
-    elif len(other_dims) == 1:
-        return sp_data.transpose(other_dims[0], "lat", "lon")
-    elif len(other_dims) >= 2:
-        return sp_data.unstack("nt").transpose(*other_dims, "lat", "lon")
-    else:
-        raise ValueError("Output data dimensions not supported.")
+    nspec = spec.shape[0]
+    spec = spec.reshape(nspec, -1).T.reshape(lead_shape + (nspec,))
+    return spec.astype(dtype, copy=False)